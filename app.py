@@ -140,6 +140,29 @@ if not products:
 
 st.success(f"✅ Loaded {len(products)} products from {data_file}")
 
+
+@st.cache_data
+def load_downloads(data_path, data_mtime, csv_path="data/output/downloads/products.csv"):
+    """Read the downloads once per pipeline run instead of on every rerun.
+
+    data.json is served as-is; the CSV comes from main.py's precomputed file,
+    or is built from data.json if that file is missing or stale. ``data_mtime``
+    is part of the cache key so a new run invalidates the cache.
+    """
+    with open(data_path, "rb") as f:
+        json_bytes = f.read()
+
+    if os.path.exists(csv_path) and os.path.getmtime(csv_path) >= data_mtime:
+        with open(csv_path, "rb") as f:
+            csv_bytes = f.read()
+    else:
+        csv_bytes = pd.DataFrame(json.loads(json_bytes)).to_csv(index=False).encode("utf-8")
+
+    return json_bytes, csv_bytes
+
+
+all_json, csv_data = load_downloads(data_file, os.path.getmtime(data_file))
+
 # ASSESSMENT REQUIREMENT 1: Display in tabular form
 st.header("📋 Product Table")
 df = pd.DataFrame(products)
@@ -261,7 +284,6 @@ with st.sidebar:
     st.header("📥 Export All Data")
 
     # Download all as JSON
-    all_json = json.dumps(products, indent=2)
     st.download_button(
         label="⬇️ Download All as JSON",
         data=all_json,
@@ -272,7 +294,6 @@ with st.sidebar:
     )
 
     # Download as CSV
-    csv_data = df.to_csv(index=False)
     st.download_button(
         label="⬇️ Download as CSV",
         data=csv_data,
@@ -2,7 +2,15 @@
 MAIN ASSESSMENT SCRIPT
 Run with: python3 main.py
 Processes BOTH provided leaflet images and outputs data.json
+
+Pass --incremental to reuse products for leaflet regions whose OCR text is
+unchanged since the previous run (cached under data/cache).
+Pass --memory-bounded to decode images from memory-mapped files, release OCR
+results after each image and report peak RSS per image.
+Pass --export parquet|arrow to also write typed columnar files partitioned by
+run date and leaflet (under data/exports).
 """
+import argparse
 import sys
 import os
 import json
@@ -12,6 +20,7 @@ sys.path.insert(0, src_path)
 
 try:
     from pipeline.process_pipeline import CompletePipeline
+    from pipeline.export import ColumnarExporter, leaflet_name, write_csv_download
 
     print("Pipeline imported successfully")
 except ImportError as e:
@@ -19,8 +28,33 @@ except ImportError as e:
     sys.exit(1)
 
 
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Extract products from leaflet images into data.json")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only send leaflet regions changed since the last run to the LLM")
+    parser.add_argument("--cache-dir", default="data/cache",
+                        help="where per-region OCR text and products are cached (default: data/cache)")
+    parser.add_argument("--memory-bounded", action="store_true",
+                        help="mmap-backed image decoding, per-image resource release and peak RSS reporting")
+    parser.add_argument("--max-decoded-images", type=positive_int, default=1,
+                        help="max decoded images held at once in --memory-bounded mode (default: 1)")
+    parser.add_argument("--export", choices=["parquet", "arrow"],
+                        help="also write products as columnar files partitioned by run date and leaflet")
+    parser.add_argument("--export-dir", default="data/exports",
+                        help="root directory for columnar exports (default: data/exports)")
+    return parser.parse_args(argv)
+
+
 def main():
     """Process BOTH assessment images and create data.json"""
+    args = parse_args()
 
     # Both images path
     image_paths = ["I&M_Image_2.jpg", "I_and_m_image4.jpg"]
@@ -44,17 +78,22 @@ def main():
     print("=" * 60)
 
     # Initialize and run pipeline
-    pipeline = CompletePipeline()
+    pipeline = CompletePipeline(incremental=args.incremental, cache_dir=args.cache_dir,
+                                memory_bounded=args.memory_bounded,
+                                max_decoded_images=args.max_decoded_images)
 
     # Process both images
     print("Processing images...")
     all_products = []
+    batches = []
+    # Created up front so a missing pyarrow fails before any LLM calls
+    exporter = ColumnarExporter(args.export_dir, fmt=args.export) if args.export else None
 
-    for image_path in image_paths:
-        print(f"\nProcessing: {image_path}")
-        products = pipeline.process_image(image_path)
+    for image_path, products in pipeline.iter_process_images(image_paths):
+        print(f"\nProcessed: {image_path}")
         if products:
             all_products.extend(products)
+            batches.append((leaflet_name(image_path), products))
             print(f"Added {len(products)} products from this image")
         else:
             print(f"No products extracted from {image_path}")
@@ -68,9 +107,25 @@ def main():
     with open(output_path, "w") as f:
         json.dump(all_products, f, indent=2)
 
+    # Precompute the web app CSV download once per run
+    csv_path = write_csv_download(all_products)
+
+    # Columnar export never blocks data.json: failures are reported per batch
+    export_paths = []
+    if exporter:
+        for leaflet, products in batches:
+            try:
+                exporter.write_batch(leaflet, products)
+            except Exception as e:
+                print(f"Columnar export failed for {leaflet}: {e}")
+        export_paths = exporter.close()
+
     print(f"\nASSESSMENT COMPLETE")
     print(f"Total products extracted: {len(all_products)}")
     print(f"Output file: {os.path.abspath(output_path)}")
+    print(f"CSV download: {csv_path}")
+    for path in export_paths:
+        print(f"Columnar export: {path}")
 
     # Show breakdown by image
     print("\nBreakdown by Image:")
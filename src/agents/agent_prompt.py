@@ -55,3 +55,30 @@ Good extractions:
 Extract ALL products from BOTH images. Be lenient - include products even with partial information.
 Return a JSON array.
 """
+
+
+REGION_EXTRACTION_PROMPT = """
+You are extracting products from several regions (tiles or blocks) of ONE supermarket leaflet.
+Each region starts with a line "=== REGION <id> ===" followed by its OCR text (may contain OCR errors).
+
+{raw_text}
+
+=== RULES ===
+1. Treat every region separately: only extract products whose name AND price appear in that region's text.
+   Never invent products, and never return example products.
+2. A region without a product with a price (headers, logos, slogans such as "every day") gets an empty array.
+3. Fix obvious OCR errors in names, e.g. "Hillerest"→"Hillcrest", "ORCANIC"→"ORGANIC", "8O0G"→"80G".
+4. Final price is a simple "$X.XX"; a price containing "per kg" / "per 100g" is the unit price.
+   "was", "save" and multi-buy ("2 for $5") prices are NOT the final price.
+
+=== FIELDS ===
+- `product_name`: REQUIRED. Name without the weight.
+- `weight_volume`: OPTIONAL. E.g. "5PK/90G", "400G".
+- `price`: REQUIRED. Final price customer pays.
+- `price_per_unit`: OPTIONAL. Only if clearly a unit price.
+- `description`: OPTIONAL. Flavors/variants only.
+Use "" for missing optional fields.
+
+Return ONLY a JSON object mapping EVERY region id to its array of product objects, e.g.
+{{"r0": [{{"product_name": "Aussie Asparagus", "weight_volume": "", "price": "$2.49", "price_per_unit": "", "description": ""}}], "r1": []}}
+"""
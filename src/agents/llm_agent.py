@@ -1,9 +1,10 @@
 import json
 import os
+import hashlib
 from dotenv import load_dotenv
 from openai import OpenAI
 
-from .agent_prompt import DATA_EXTRACTION_PROMPT
+from .agent_prompt import DATA_EXTRACTION_PROMPT, REGION_EXTRACTION_PROMPT
 
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -27,6 +28,8 @@ if os.getenv('OPENAI_API_KEY'):
 
 
 class LLMExtractionAgent:
+    model = "gpt-3.5-turbo"  # or "gpt-4" for better accuracy
+
     def __init__(self, api_key=None):
         """Initialize with OpenAI client."""
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
@@ -44,12 +47,48 @@ class LLMExtractionAgent:
 
     def extract_products(self, raw_ocr_text):
         """Send OCR text to LLM and return structured JSON."""
-
-        prompt = DATA_EXTRACTION_PROMPT.format(raw_text=raw_ocr_text)
+        products = self._request_json(DATA_EXTRACTION_PROMPT, raw_ocr_text)
+        if not isinstance(products, list):
+            if products is not None:
+                print(f"LLM response was not a JSON array: {products}")
+            return []
+        return products
+
+    def extract_region_products(self, regions):
+        """Extract products for several leaflet regions in a single request.
+
+        ``regions`` maps region ids to OCR text. Returns a dict mapping each id
+        to its product list, or to None when the request failed or the
+        response left that region out, so callers can tell a failure apart
+        from a region without products.
+        """
+        region_text = "\n\n".join(f"=== REGION {region_id} ===\n{text}"
+                                   for region_id, text in regions.items())
+        result = self._request_json(REGION_EXTRACTION_PROMPT, region_text)
+        if not isinstance(result, dict):
+            if result is not None:
+                print(f"LLM response was not a JSON object keyed by region: {result}")
+            return {region_id: None for region_id in regions}
+
+        products = {}
+        for region_id in regions:
+            region_products = result.get(region_id)
+            products[region_id] = region_products if isinstance(region_products, list) else None
+        return products
+
+    def region_fingerprint(self):
+        """Hash of the region prompt and model, used to invalidate cached regions."""
+        return hashlib.sha256(f"{self.model}\n{REGION_EXTRACTION_PROMPT}".encode("utf-8")).hexdigest()
+
+    def _request_json(self, prompt_template, raw_ocr_text):
+        """Run one extraction request; returns the parsed JSON or None on failure."""
+
+        prompt = prompt_template.format(raw_text=raw_ocr_text)
+        result_text = ""
 
         try:
             response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",  # or "gpt-4" for better accuracy
+                model=self.model,
                 messages=[
                     {"role": "system", "content": "You are a precise data extraction assistant."},
                     {"role": "user", "content": prompt}
@@ -67,16 +106,15 @@ class LLMExtractionAgent:
                 result_text = result_text[3:-3]
 
             # Parse JSON
-            products = json.loads(result_text)
-            return products
+            return json.loads(result_text)
 
         except json.JSONDecodeError as e:
             print(f"Failed to parse LLM response as JSON: {e}")
             print(f"Raw response was: {result_text}")
-            return []
+            return None
         except Exception as e:
             print(f"LLM API error: {e}")
-            return []
+            return None
 
 
 def test_llm_agent():
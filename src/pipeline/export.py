@@ -0,0 +1,149 @@
+import os
+import json
+import uuid
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+PRODUCT_COLUMNS = ['product_name', 'weight_volume', 'price', 'price_per_unit', 'description']
+
+FORMAT_EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+
+def parse_price(price):
+    """Parse a price string such as "$1,299.00" into a float, or None."""
+    if price is None:
+        return None
+    try:
+        return float(str(price).replace('$', '').replace(',', '').strip())
+    except ValueError:
+        return None
+
+
+def _as_text(value):
+    """Coerce an LLM field value to a string column value (None when empty)."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return str(value)
+
+
+def leaflet_name(image_path):
+    """Partition-safe leaflet name derived from the image file name."""
+    stem = os.path.splitext(os.path.basename(image_path))[0]
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in stem)
+
+
+def product_schema():
+    """Typed Arrow schema for exported products (partition columns live in the path)."""
+    return pa.schema([
+        ('product_name', pa.string()),
+        ('weight_volume', pa.string()),
+        ('price', pa.string()),
+        ('price_value', pa.float64()),
+        ('price_per_unit', pa.string()),
+        ('description', pa.string()),
+        ('extracted_at', pa.timestamp('ms')),
+    ])
+
+
+class ColumnarExporter:
+    """Write products as Parquet/Arrow files partitioned by run date and leaflet.
+
+    Files are laid out hive-style as
+    ``<output_dir>/run_date=YYYY-MM-DD/leaflet=<name>/part-<HHMMSS>-<run id>.<ext>``
+    and every ``write_batch`` call becomes one row group (Parquet) or record
+    batch (Arrow), so readers can prune both partitions and columns:
+
+        pyarrow.dataset.dataset("data/exports", format="parquet", partitioning="hive")
+    """
+
+    def __init__(self, output_dir="data/exports", fmt="parquet", run_started=None):
+        if pa is None:
+            raise ImportError("Columnar export requires pyarrow: pip install pyarrow")
+        if fmt not in FORMAT_EXTENSIONS:
+            raise ValueError(f"Unsupported export format: {fmt} (expected one of {list(FORMAT_EXTENSIONS)})")
+
+        self.output_dir = output_dir
+        self.fmt = fmt
+        self.run_started = run_started or datetime.now()
+        self.run_id = uuid.uuid4().hex[:8]
+        self.schema = product_schema()
+        self._writers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _partition_path(self, leaflet):
+        run_date = self.run_started.date().isoformat()
+        part_dir = os.path.join(self.output_dir, f"run_date={run_date}", f"leaflet={leaflet}")
+        os.makedirs(part_dir, exist_ok=True)
+        file_name = f"part-{self.run_started.strftime('%H%M%S')}-{self.run_id}{FORMAT_EXTENSIONS[self.fmt]}"
+        return os.path.join(part_dir, file_name)
+
+    def _writer(self, leaflet):
+        if leaflet not in self._writers:
+            path = self._partition_path(leaflet)
+            if self.fmt == "parquet":
+                writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+            else:
+                writer = pa.ipc.new_file(path, self.schema)
+            self._writers[leaflet] = [path, writer, 0]
+        return self._writers[leaflet]
+
+    def to_table(self, products):
+        """Build a typed Arrow table from a list of product dicts.
+
+        LLM output is loosely typed, so every non-empty field is stored as a string.
+        """
+        columns = {col: [_as_text(p.get(col)) for p in products] for col in PRODUCT_COLUMNS}
+        columns['price_value'] = [parse_price(p.get('price')) for p in products]
+        columns['extracted_at'] = [self.run_started.replace(microsecond=0)] * len(products)
+        return pa.table(columns, schema=self.schema)
+
+    def write_batch(self, leaflet, products):
+        """Append one batch of products for a leaflet as its own row group."""
+        if not products:
+            return
+        # Build the table first so a bad batch never creates an empty part file
+        table = self.to_table(products)
+        state = self._writer(leaflet)
+        state[1].write_table(table)
+        state[2] += table.num_rows
+
+    def close(self):
+        """Finalize all open files and return the paths of those holding rows.
+
+        Files that ended up without rows are removed.
+        """
+        paths = []
+        for path, writer, rows in self._writers.values():
+            writer.close()
+            if rows:
+                paths.append(path)
+            else:
+                os.remove(path)
+        self._writers = {}
+        return paths
+
+
+def write_csv_download(products, artifacts_dir="data/output/downloads"):
+    """Precompute the web app's CSV download once per pipeline run."""
+    os.makedirs(artifacts_dir, exist_ok=True)
+
+    csv_path = os.path.join(artifacts_dir, "products.csv")
+    pd.DataFrame(products).to_csv(csv_path, index=False)
+
+    return csv_path
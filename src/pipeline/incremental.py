@@ -0,0 +1,195 @@
+import os
+import re
+import json
+import hashlib
+
+
+# Any price, including unit prices such as "$2.21 per 100g"
+PRICE_PATTERN = re.compile(r'\$\s*\d+(?:[.,]\d{1,2})?|\b\d+\.\d{2}\b')
+# Prices that are not what the customer pays for the item: unit prices,
+# "was"/"save"/"off"/RRP prices and multi-buy deals such as "2 for $5"
+NON_ITEM_PRICE_PATTERN = re.compile(
+    r'\b(?:per|was|save|off|rrp)\b|/\s*\d*\s*(?:kg|g|ml|l)\b|\b\d+\s*for\s*\$',
+    re.IGNORECASE,
+)
+
+
+def contains_price(text):
+    """True if the text holds anything that looks like a price."""
+    return bool(PRICE_PATTERN.search(text))
+
+
+def _is_item_price(text):
+    """True for a final item price line, i.e. not a unit, was/save or multi-buy price."""
+    return contains_price(text) and not NON_ITEM_PRICE_PATTERN.search(text)
+
+
+def _is_text_line(text):
+    """True for a line with words and no price, such as a product name."""
+    return not contains_price(text) and any(c.isalpha() for c in text)
+
+
+def _box_bounds(box):
+    """Return (x1, y1, x2, y2) for a rec_box or a polygon of points."""
+    box = [list(p) if hasattr(p, '__len__') else p for p in box]
+    if box and isinstance(box[0], list):
+        xs = [float(p[0]) for p in box]
+        ys = [float(p[1]) for p in box]
+        return min(xs), min(ys), max(xs), max(ys)
+    x1, y1, x2, y2 = (float(v) for v in box[:4])
+    return x1, y1, x2, y2
+
+
+def _cuts(indices, bounds, axis):
+    """Yield (gap, before, after) for every whitespace gap along an axis."""
+    lo, hi = axis, axis + 2
+    ordered = sorted(indices, key=lambda i: bounds[i][lo])
+    reach = bounds[ordered[0]][hi]
+
+    for pos in range(1, len(ordered)):
+        start = bounds[ordered[pos]][lo]
+        if start > reach:
+            yield start - reach, ordered[:pos], ordered[pos:]
+        reach = max(reach, bounds[ordered[pos]][hi])
+
+
+def _split_region(indices, bounds, kinds, min_gap):
+    """Recursive XY-cut until each region holds at most one item price.
+
+    ``kinds`` maps each box to (is_item_price, is_text_line). A cut is only
+    taken if every side keeps a text line, so no price is left without a
+    name. Cuts that leave an item price on both sides are preferred (widest
+    gap first); otherwise the widest gap is cut only if it is at least
+    ``min_gap``, which peels off headers separated by clear whitespace.
+    """
+    if sum(kinds[i][0] for i in indices) <= 1:
+        return [indices]
+
+    def has(group, kind):
+        return any(kinds[i][kind] for i in group)
+
+    best = None
+    for axis in (0, 1):
+        for gap, before, after in _cuts(indices, bounds, axis):
+            if not (has(before, 1) and has(after, 1)):
+                continue
+            balanced = has(before, 0) and has(after, 0)
+            key = (balanced, gap)
+            if best is None or key > best[0]:
+                best = (key, before, after)
+
+    if best is None:
+        return [indices]
+
+    (balanced, gap), before, after = best
+    if not balanced and gap < min_gap:
+        return [indices]
+
+    return (_split_region(before, bounds, kinds, min_gap) +
+            _split_region(after, bounds, kinds, min_gap))
+
+
+def group_text_regions(rec_texts, rec_boxes=None, gap_ratio=1.0):
+    """Group OCR text boxes into spatial regions (e.g. product tiles).
+
+    Boxes are split with a column-aware XY-cut along whitespace gaps until
+    every region holds at most one item price, never leaving a price without
+    a text line. Gaps that would separate a block without any item price (a
+    header, a slogan) are only cut when they are at least ``gap_ratio`` times
+    the median box height. Lines keep their ``rec_texts`` order within a
+    region. Without boxes, all text is treated as a single region.
+    """
+    if rec_boxes is None or len(rec_boxes) != len(rec_texts) or not rec_texts:
+        return ["\n".join(rec_texts)] if rec_texts else []
+
+    bounds = [_box_bounds(box) for box in rec_boxes]
+    heights = sorted(y2 - y1 for _, y1, _, y2 in bounds)
+    min_gap = heights[len(heights) // 2] * gap_ratio
+    kinds = [(_is_item_price(text), _is_text_line(text)) for text in rec_texts]
+
+    groups = _split_region(list(range(len(rec_texts))), bounds, kinds, min_gap)
+    return ["\n".join(rec_texts[i] for i in sorted(group)) for group in groups]
+
+
+def region_hash(region_text):
+    """Stable hash of a region's text, insensitive to whitespace changes."""
+    normalized = " ".join(region_text.split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class RegionCache:
+    """Per-image store of region OCR text and the products extracted from it.
+
+    ``fingerprint`` identifies the prompt/model that produced the products;
+    a cache written under a different fingerprint is ignored.
+    """
+
+    def __init__(self, cache_dir="data/cache", fingerprint=None):
+        self.cache_dir = cache_dir
+        self.fingerprint = fingerprint
+
+    def _cache_path(self, cache_key):
+        safe_key = "".join(c if c.isalnum() or c in "-_." else "_" for c in cache_key)
+        return os.path.join(self.cache_dir, f"{safe_key}.regions.json")
+
+    def load(self, cache_key):
+        """Return {region_hash: {"hash", "text", "products"}} from the previous run."""
+        path = self._cache_path(cache_key)
+        if not os.path.exists(path):
+            return {}
+
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            regions = data["regions"]
+            fingerprint = data.get("fingerprint")
+            entries = {entry["hash"]: entry for entry in regions if isinstance(entry, dict)}
+        except (OSError, json.JSONDecodeError, KeyError, TypeError, AttributeError) as e:
+            print(f"   Ignoring unreadable region cache {path}: {e!r}")
+            return {}
+
+        if fingerprint != self.fingerprint:
+            print(f"   Ignoring region cache {path}: prompt or model changed")
+            return {}
+
+        return entries
+
+    def save(self, cache_key, regions):
+        """Persist a list of {"hash", "text", "products"} entries for this image.
+
+        Entries whose extraction failed keep ``products`` as None so they are
+        retried on the next run.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._cache_path(cache_key)
+        tmp_path = path + ".tmp"
+
+        with open(tmp_path, "w") as f:
+            json.dump({"fingerprint": self.fingerprint, "regions": regions}, f, indent=2)
+        os.replace(tmp_path, path)
+
+        return path
+
+
+def diff_regions(region_texts, previous):
+    """Split regions into those reusable from ``previous`` and those that changed.
+
+    Returns (entries, changed) where ``entries`` holds one dict per region in
+    order (products filled in for unchanged regions) and ``changed`` lists the
+    indices that need to go through the LLM. Cached entries without a product
+    list (failed extractions) count as changed.
+    """
+    entries = []
+    changed = []
+
+    for idx, text in enumerate(region_texts):
+        digest = region_hash(text)
+        cached = previous.get(digest)
+        products = cached.get("products") if cached is not None else None
+        if isinstance(products, list):
+            entries.append({"hash": digest, "text": text, "products": products})
+        else:
+            entries.append({"hash": digest, "text": text, "products": None})
+            changed.append(idx)
+
+    return entries, changed
@@ -0,0 +1,73 @@
+import os
+import mmap
+
+import cv2
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def load_image_mmap(image_path):
+    """Decode an image from a memory-mapped file instead of reading it into a bytes copy."""
+    if not os.path.exists(image_path):
+        raise FileNotFoundError(f"Image not found: {image_path}")
+
+    with open(image_path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            buffer = np.frombuffer(mm, dtype=np.uint8)
+            try:
+                image = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+            finally:
+                # The mmap cannot close while a numpy view still exports its buffer
+                del buffer
+
+    if image is None:
+        raise ValueError(f"Could not decode image: {image_path}")
+
+    return image
+
+
+def _proc_status_mb(field):
+    """Read a kB field such as VmRSS/VmHWM from /proc/self/status, in MB."""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def current_rss_mb():
+    """Current resident set size in MB, or None if unavailable."""
+    return _proc_status_mb("VmRSS")
+
+
+def peak_rss_mb():
+    """Peak resident set size in MB since start (or since the last reset_peak_rss)."""
+    peak = _proc_status_mb("VmHWM")
+    if peak is not None or resource is None:
+        return peak
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    if os.uname().sysname == "Darwin":
+        return max_rss / (1024 * 1024)
+    return max_rss / 1024
+
+
+def reset_peak_rss():
+    """Reset the kernel's peak RSS counter so it can be measured per image.
+
+    Only supported on Linux; returns False when the peak stays process-wide.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
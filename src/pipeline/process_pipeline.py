@@ -1,6 +1,9 @@
 import os
+import gc
 import json
 import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 src_dir = os.path.dirname(current_dir)
@@ -22,12 +25,28 @@ except ImportError as e:
     spec.loader.exec_module(llm_agent_module)
     LLMExtractionAgent = llm_agent_module.LLMExtractionAgent
 
+from pipeline.incremental import RegionCache, group_text_regions, diff_regions, contains_price
+from pipeline.memory import load_image_mmap, current_rss_mb, peak_rss_mb, reset_peak_rss
 from paddleocr import PaddleOCR
 
 
 class CompletePipeline:
-    def __init__(self):
-        """Initialize OCR and LLM components."""
+    def __init__(self, incremental=False, cache_dir="data/cache",
+                 memory_bounded=False, max_decoded_images=1):
+        """Initialize OCR and LLM components.
+
+        With ``incremental=True`` the per-region OCR text and products of each
+        run are cached in ``cache_dir`` and only changed regions are re-sent
+        to the LLM on the next run.
+
+        With ``memory_bounded=True`` images are decoded from memory-mapped
+        files, OCR result objects are released right after text/box
+        extraction, at most ``max_decoded_images`` decoded images are alive
+        at once, and peak RSS is reported per image.
+        """
+        if max_decoded_images < 1:
+            raise ValueError("max_decoded_images must be at least 1")
+
         # Initialize OCR
         try:
             self.ocr_engine = PaddleOCR(use_textline_orientation=True, lang='en')
@@ -36,41 +55,187 @@ class CompletePipeline:
 
 
         self.llm_agent = LLMExtractionAgent()
-
-    def process_image(self, image_path):
-        """Process a single image: OCR → LLM → Structured data."""
-        if not os.path.exists(image_path):
+        self.incremental = incremental
+        self.region_cache = (RegionCache(cache_dir, fingerprint=self.llm_agent.region_fingerprint())
+                             if incremental else None)
+        self.memory_bounded = memory_bounded
+        self.max_decoded_images = max_decoded_images
+        self.memory_report = []
+
+    def process_image(self, image_path, image_slot=None, per_image_peak=None):
+        """Process a single image: OCR → LLM → Structured data.
+
+        ``image_slot`` may be a one-element list holding the already decoded
+        image for ``image_path``; it is emptied once OCR is done so the image
+        is not kept alive during the LLM step. ``per_image_peak`` says whether
+        peak RSS was already reset before it was decoded.
+        """
+        if not image_slot and not os.path.exists(image_path):
             raise FileNotFoundError(f"Image not found: {image_path}")
 
         print(f"📷 Processing: {os.path.basename(image_path)}")
 
-        # Step 1: OCR
-        result = self.ocr_engine.predict(image_path)
-        if not result:
-            return []
+        if self.memory_bounded and per_image_peak is None:
+            per_image_peak = reset_peak_rss()
 
-        ocr_result = result[0]
-        rec_texts = ocr_result.get('rec_texts', [])
+        # Step 1: OCR
+        rec_texts, rec_boxes = self._run_ocr(image_path, image_slot)
 
         if not rec_texts:
-            return []
+            products = []
+        else:
+            print(f"   Extracted {len(rec_texts)} text boxes")
 
-        # Combine OCR text
-        ocr_text = "\n".join(rec_texts)
-        print(f"   Extracted {len(rec_texts)} text boxes")
+            # Step 2: LLM Structuring
+            if self.incremental:
+                products = self._extract_incremental(image_path, rec_texts, rec_boxes)
+            else:
+                products = self.llm_agent.extract_products("\n".join(rec_texts))
+                print(f"   Structured into {len(products)} products")
 
-        # Step 2: LLM Structuring
-        products = self.llm_agent.extract_products(ocr_text)
-        print(f"   Structured into {len(products)} products")
+        if self.memory_bounded:
+            self._record_memory(image_path, per_image_peak)
 
         return products
 
+    def _run_ocr(self, image_path, image_slot=None):
+        """Run OCR and return plain (rec_texts, rec_boxes) lists."""
+        # Take the decoded image out of the slot: this frame holds the only reference
+        image = image_slot.pop() if image_slot else None
+        if self.memory_bounded and image is None:
+            image = load_image_mmap(image_path)
+
+        result = self.ocr_engine.predict(image if image is not None else image_path)
+        image = None
+        if not result:
+            return [], None
+
+        ocr_result = result[0]
+        rec_texts = list(ocr_result.get('rec_texts', []))
+        rec_boxes = ocr_result.get('rec_boxes')
+
+        if self.memory_bounded:
+            # Keep only plain Python data; drop the predictor's result objects
+            # (intermediate maps, decoded input image) before the LLM step
+            if rec_boxes is not None:
+                rec_boxes = rec_boxes.tolist() if hasattr(rec_boxes, 'tolist') else list(rec_boxes)
+            del result, ocr_result
+            gc.collect()
+
+        return rec_texts, rec_boxes
+
+    def _record_memory(self, image_path, per_image_peak):
+        """Record and print peak/current RSS after processing an image."""
+        peak = peak_rss_mb()
+        rss = current_rss_mb()
+        self.memory_report.append({
+            "image": os.path.basename(image_path),
+            "peak_rss_mb": peak,
+            "rss_mb": rss,
+            "per_image_peak": per_image_peak,
+        })
+
+        if peak is not None:
+            scope = "" if per_image_peak else " (process-wide)"
+            current = f", current {rss:.0f} MB" if rss is not None else ""
+            print(f"   Peak RSS{scope}: {peak:.0f} MB{current}")
+
+    def _extract_incremental(self, image_path, rec_texts, rec_boxes):
+        """Send only regions whose OCR text changed since the last run to the LLM.
+
+        All changed regions of the image go out in one request, so an image
+        costs at most one LLM call, and none when nothing priced changed.
+        """
+        cache_key = os.path.basename(image_path)
+        regions = group_text_regions(rec_texts, rec_boxes)
+        previous = self.region_cache.load(cache_key)
+
+        entries, changed = diff_regions(regions, previous)
+        print(f"   {len(regions)} regions, {len(changed)} changed since last run")
+
+        # Headers, logos and slogans hold no product; only priced regions go
+        # to the LLM, all together in one request keyed by region id
+        pending = {}
+        for idx in changed:
+            if contains_price(entries[idx]["text"]):
+                pending[f"r{idx}"] = idx
+            else:
+                entries[idx]["products"] = []
+
+        failed = 0
+        if pending:
+            results = self.llm_agent.extract_region_products(
+                {region_id: entries[idx]["text"] for region_id, idx in pending.items()})
+            for region_id, idx in pending.items():
+                entries[idx]["products"] = results.get(region_id)
+                if entries[idx]["products"] is None:
+                    failed += 1
+
+        products = []
+        for entry in entries:
+            products.extend(entry["products"] or [])
+
+        self.region_cache.save(cache_key, entries)
+        sent = f"{len(pending)} sent to LLM in one request" if pending else "no LLM call"
+        print(f"   Structured into {len(products)} products "
+              f"({len(regions) - len(changed)} regions reused, {sent})")
+        if failed:
+            print(f"   ⚠️ {failed} regions failed and will be retried next run")
+
+        return products
+
+    def _iter_decoded(self, image_paths):
+        """Yield (path, image_slot, per_image_peak), keeping at most max_decoded_images alive.
+
+        ``image_slot`` is a one-element list holding the decoded image; the
+        generator keeps no other reference, so the image is freed as soon as
+        the consumer empties the slot.
+
+        Peak RSS is reset before each image's decode is submitted. With
+        max_decoded_images=1 decoding and processing never overlap; with 2 or
+        more, up to max_decoded_images - 1 following images are decoded in a
+        background thread while the current one goes through OCR and the LLM,
+        and their decode memory counts toward the current image's peak.
+        """
+        paths = iter(image_paths)
+        pending = deque()
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            while True:
+                per_image_peak = reset_peak_rss()
+
+                while len(pending) < self.max_decoded_images:
+                    next_path = next(paths, None)
+                    if next_path is None:
+                        break
+                    pending.append((next_path, pool.submit(load_image_mmap, next_path)))
+
+                if not pending:
+                    return
+
+                path, future = pending.popleft()
+                image_slot = [future.result()]
+                future = None
+                yield path, image_slot, per_image_peak
+                image_slot = None
+
+    def iter_process_images(self, image_paths):
+        """Process images one at a time, yielding (image_path, products)."""
+        if not self.memory_bounded:
+            for image_path in image_paths:
+                yield image_path, self.process_image(image_path)
+            return
+
+        for image_path, image_slot, per_image_peak in self._iter_decoded(image_paths):
+            products = self.process_image(image_path, image_slot=image_slot,
+                                          per_image_peak=per_image_peak)
+            yield image_path, products
+
     def process_multiple_images(self, image_paths):
         """Process multiple images and combine results."""
         all_products = []
 
-        for image_path in image_paths:
-            products = self.process_image(image_path)
+        for _, products in self.iter_process_images(image_paths):
             all_products.extend(products)
 
         return all_products
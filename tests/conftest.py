@@ -0,0 +1,47 @@
+import importlib
+import os
+import sys
+import types
+
+import pytest
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+src_dir = os.path.join(project_root, "src")
+for path in (project_root, src_dir):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def _stub_missing_module(name, **attrs):
+    """Register a bare module for a heavy dependency that is not installed."""
+    try:
+        importlib.import_module(name)
+    except ImportError:
+        module = types.ModuleType(name)
+        module.__dict__.update(attrs)
+        sys.modules[name] = module
+
+
+@pytest.fixture
+def heavy_modules_stubbed():
+    """Make OCR/LLM/OpenCV imports succeed when those packages are not installed.
+
+    Tests replace PaddleOCR, LLMExtractionAgent and image decoding with
+    fakes through monkeypatch.
+    """
+    _stub_missing_module("dotenv", load_dotenv=lambda **kwargs: None)
+    _stub_missing_module("openai", OpenAI=object)
+    _stub_missing_module("paddleocr", PaddleOCR=object)
+    _stub_missing_module("cv2", IMREAD_COLOR=1, imdecode=lambda buffer, flags: None)
+
+
+@pytest.fixture
+def process_pipeline(heavy_modules_stubbed):
+    from pipeline import process_pipeline
+    return process_pipeline
+
+
+@pytest.fixture
+def memory(heavy_modules_stubbed):
+    from pipeline import memory
+    return memory
@@ -0,0 +1,111 @@
+import pytest
+
+pytest.importorskip("pandas")
+pa = pytest.importorskip("pyarrow")
+ds = pytest.importorskip("pyarrow.dataset")
+pq = pytest.importorskip("pyarrow.parquet")
+
+from datetime import datetime
+
+from pipeline.export import ColumnarExporter, leaflet_name, parse_price, write_csv_download
+
+RUN_STARTED = datetime(2026, 10, 19, 9, 30, 15)
+
+
+def test_parse_price():
+    assert parse_price("$1.99") == 1.99
+    assert parse_price("$1,299.00") == 1299.0
+    assert parse_price(2.5) == 2.5
+    assert parse_price("") is None
+    assert parse_price(None) is None
+    assert parse_price("two dollars") is None
+
+
+def test_leaflet_name():
+    assert leaflet_name("/tmp/I&M_Image_2.jpg") == "I_M_Image_2"
+    assert leaflet_name("I_and_m_image4.jpg") == "I_and_m_image4"
+
+
+def test_to_table_coerces_llm_values_to_strings(tmp_path):
+    exporter = ColumnarExporter(str(tmp_path), run_started=RUN_STARTED)
+    table = exporter.to_table([
+        {"product_name": "Tim Tam", "price": 3.99, "description": ["Original", "Double"]},
+        {"product_name": "Coca-Cola", "price": "$2.49", "weight_volume": ""},
+    ])
+
+    assert table.schema == exporter.schema
+    assert table.column("price").to_pylist() == ["3.99", "$2.49"]
+    assert table.column("price_value").to_pylist() == [3.99, 2.49]
+    assert table.column("description").to_pylist() == ['["Original", "Double"]', None]
+    assert table.column("weight_volume").to_pylist() == [None, None]
+
+
+def test_parquet_round_trip_with_hive_partitions(tmp_path):
+    with ColumnarExporter(str(tmp_path), run_started=RUN_STARTED) as exporter:
+        exporter.write_batch("I_M_Image_2", [{"product_name": "A", "price": "$1.99"}])
+        exporter.write_batch("I_M_Image_2", [{"product_name": "B", "price": "$2.99"},
+                                             {"product_name": "C", "price": "$3.99"}])
+        exporter.write_batch("I_and_m_image4", [{"product_name": "D", "price": "$4.99"}])
+        exporter.write_batch("empty", [])
+        paths = exporter.close()
+
+    assert len(paths) == 2
+    image2_path = next(p for p in paths if "leaflet=I_M_Image_2" in p)
+    assert "run_date=2026-10-19" in image2_path
+    assert pq.ParquetFile(image2_path).num_row_groups == 2
+
+    dataset = ds.dataset(str(tmp_path), format="parquet", partitioning="hive")
+    table = dataset.to_table(columns=["product_name", "price_value", "leaflet"],
+                             filter=ds.field("leaflet") == "I_M_Image_2")
+
+    assert sorted(table.column("product_name").to_pylist()) == ["A", "B", "C"]
+    assert table.schema.field("price_value").type == pa.float64()
+    assert dataset.schema.field("extracted_at").type == pa.timestamp("ms")
+
+
+def test_arrow_round_trip(tmp_path):
+    with ColumnarExporter(str(tmp_path), fmt="arrow", run_started=RUN_STARTED) as exporter:
+        exporter.write_batch("leaflet", [{"product_name": "A", "price": "$1.99"}])
+        exporter.write_batch("leaflet", [{"product_name": "B", "price": "$2.99"}])
+        path, = exporter.close()
+
+    with pa.ipc.open_file(path) as reader:
+        assert reader.num_record_batches == 2
+
+    dataset = ds.dataset(str(tmp_path), format="arrow", partitioning="hive")
+    assert dataset.to_table().num_rows == 2
+
+
+def test_runs_in_the_same_second_do_not_overwrite(tmp_path):
+    paths = []
+    for name in ("A", "B"):
+        with ColumnarExporter(str(tmp_path), run_started=RUN_STARTED) as exporter:
+            exporter.write_batch("leaflet", [{"product_name": name, "price": "$1.00"}])
+            paths.extend(exporter.close())
+
+    assert paths[0] != paths[1]
+    dataset = ds.dataset(str(tmp_path), format="parquet", partitioning="hive")
+    assert dataset.to_table().num_rows == 2
+
+
+def test_unsupported_format(tmp_path):
+    with pytest.raises(ValueError):
+        ColumnarExporter(str(tmp_path), fmt="orc")
+
+
+def test_write_csv_download(tmp_path):
+    path = write_csv_download([{"product_name": "A", "price": "$1.99"}], str(tmp_path))
+
+    with open(path) as f:
+        assert f.read().splitlines() == ["product_name,price", "A,$1.99"]
+
+
+def test_failed_batch_leaves_no_part_file(tmp_path):
+    with ColumnarExporter(str(tmp_path), run_started=RUN_STARTED) as exporter:
+        with pytest.raises(AttributeError):
+            exporter.write_batch("bad", ["not a product"])
+        exporter.write_batch("good", [{"product_name": "A", "price": "$1.99"}])
+        paths = exporter.close()
+
+    assert len(paths) == 1 and "leaflet=good" in paths[0]
+    assert not list(tmp_path.glob("**/leaflet=bad/*.parquet"))
@@ -0,0 +1,110 @@
+import json
+
+from pipeline.incremental import (
+    RegionCache, contains_price, diff_regions, group_text_regions, region_hash,
+)
+
+
+def test_adjacent_tiles_are_split_by_column():
+    # Two tiles 10px apart with 20px lines; OCR returns lines row by row
+    texts = ["A", "B", "$1.99", "$2.99"]
+    boxes = [
+        [0, 0, 100, 20], [110, 0, 210, 20],
+        [0, 25, 100, 45], [110, 25, 210, 45],
+    ]
+
+    assert group_text_regions(texts, boxes) == ["A\n$1.99", "B\n$2.99"]
+
+
+def test_header_above_tiles_gets_its_own_region():
+    texts = ["WEEKLY SPECIALS", "A", "B", "$1.99", "$2.99"]
+    boxes = [
+        [0, 0, 210, 30],
+        [0, 60, 100, 80], [110, 60, 210, 80],
+        [0, 85, 100, 105], [110, 85, 210, 105],
+    ]
+
+    assert group_text_regions(texts, boxes) == ["WEEKLY SPECIALS", "A\n$1.99", "B\n$2.99"]
+
+
+def test_tile_keeps_rec_texts_order_and_unit_price():
+    texts = ["HILLCREST BARS 5PK/90G", "$2.21 per 100g", "$1.99", "every day"]
+    boxes = [[0, 0, 200, 20], [0, 25, 90, 45], [100, 25, 200, 60], [0, 65, 200, 85]]
+
+    assert group_text_regions(texts, boxes) == ["\n".join(texts)]
+
+
+def test_without_boxes_everything_is_one_region():
+    assert group_text_regions(["A", "$1.99"]) == ["A\n$1.99"]
+    assert group_text_regions([]) == []
+
+
+def test_contains_price():
+    assert contains_price("$1.99")
+    assert contains_price("$78.73 per kg")
+    assert not contains_price("every day")
+
+
+def test_diff_regions_reuses_unchanged_and_retries_failed():
+    previous = {
+        region_hash("A\n$1.99"): {"products": [{"product_name": "A"}]},
+        region_hash("B\n$2.99"): {"products": None},
+    }
+
+    entries, changed = diff_regions(["A  \n$1.99", "B\n$2.99", "C\n$3.99"], previous)
+
+    assert changed == [1, 2]
+    assert entries[0]["products"] == [{"product_name": "A"}]
+    assert entries[1]["products"] is None
+
+
+def test_region_cache_round_trip(tmp_path):
+    cache = RegionCache(str(tmp_path), fingerprint="v1")
+    entries, _ = diff_regions(["A\n$1.99", "B\n$2.99"], {})
+    entries[0]["products"] = [{"product_name": "A"}]
+
+    cache.save("I&M_Image_2.jpg", entries)
+    loaded = cache.load("I&M_Image_2.jpg")
+
+    _, changed = diff_regions(["A\n$1.99", "B\n$2.99"], loaded)
+    assert changed == [1]
+
+
+def test_region_cache_ignores_other_fingerprint(tmp_path):
+    entries, _ = diff_regions(["A\n$1.99"], {})
+    entries[0]["products"] = []
+    RegionCache(str(tmp_path), fingerprint="v1").save("leaflet.jpg", entries)
+
+    assert RegionCache(str(tmp_path), fingerprint="v2").load("leaflet.jpg") == {}
+
+
+def test_region_cache_ignores_wrong_shape(tmp_path):
+    cache = RegionCache(str(tmp_path))
+    for content in ([{"text": "A"}], {"regions": [{"text": "A"}]}, "nope"):
+        with open(cache._cache_path("leaflet.jpg"), "w") as f:
+            json.dump(content, f)
+        assert cache.load("leaflet.jpg") == {}
+
+
+def test_was_price_stays_with_its_tile():
+    texts = ["TIM TAM 200G", "was $4.99", "$3.99"]
+    boxes = [[0, 0, 200, 20], [0, 25, 90, 45], [0, 50, 90, 70]]
+
+    assert group_text_regions(texts, boxes) == ["TIM TAM 200G\nwas $4.99\n$3.99"]
+
+
+def test_save_and_multi_buy_lines_are_not_split_off():
+    texts = ["A", "SAVE $1.00", "$1.99", "B", "2 for $5", "$2.99"]
+    boxes = [
+        [0, 0, 100, 20], [0, 25, 100, 45], [0, 50, 100, 70],
+        [110, 0, 210, 20], [110, 25, 210, 45], [110, 50, 210, 70],
+    ]
+
+    assert group_text_regions(texts, boxes) == ["A\nSAVE $1.00\n$1.99", "B\n2 for $5\n$2.99"]
+
+
+def test_price_above_name_layout():
+    texts = ["$1.99", "Tim Tam 200g", "$2.49", "Coke 1.25L"]
+    boxes = [[0, 0, 100, 20], [0, 25, 100, 45], [0, 60, 100, 80], [0, 85, 100, 105]]
+
+    assert group_text_regions(texts, boxes) == ["$1.99\nTim Tam 200g", "$2.49\nCoke 1.25L"]
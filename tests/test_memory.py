@@ -0,0 +1,140 @@
+import threading
+import types
+import weakref
+
+import pytest
+
+
+class FakeImage:
+    def __init__(self, path):
+        self.path = path
+
+
+class Tracker:
+    """Records decode/OCR/LLM events and which decoded images are alive."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.events = []
+        self.alive = weakref.WeakSet()
+        self.max_alive = 0
+        self.alive_during_llm = []
+
+    def decode(self, path):
+        image = FakeImage(path)
+        with self.lock:
+            self.alive.add(image)
+            self.max_alive = max(self.max_alive, len(self.alive))
+            self.events.append(("decode", path))
+        return image
+
+
+@pytest.fixture
+def tracker():
+    return Tracker()
+
+
+@pytest.fixture
+def make_pipeline(process_pipeline, monkeypatch, tracker):
+    class FakeOCR:
+        def __init__(self, **kwargs):
+            pass
+
+        def predict(self, image):
+            tracker.events.append(("ocr", image.path))
+            return [{"rec_texts": [image.path], "rec_boxes": None}]
+
+    class FakeAgent:
+        def extract_products(self, raw_ocr_text):
+            tracker.alive_during_llm.append(len(tracker.alive))
+            return [{"product_name": raw_ocr_text}]
+
+    monkeypatch.setattr(process_pipeline, "PaddleOCR", FakeOCR)
+    monkeypatch.setattr(process_pipeline, "LLMExtractionAgent", FakeAgent)
+    monkeypatch.setattr(process_pipeline, "load_image_mmap", tracker.decode)
+    monkeypatch.setattr(process_pipeline, "reset_peak_rss", lambda: True)
+    monkeypatch.setattr(process_pipeline, "peak_rss_mb", lambda: 512.0)
+    monkeypatch.setattr(process_pipeline, "current_rss_mb", lambda: 256.0)
+    return process_pipeline.CompletePipeline
+
+
+def test_no_prefetch_with_one_decoded_image(make_pipeline, tracker):
+    pipeline = make_pipeline(memory_bounded=True, max_decoded_images=1)
+
+    products = pipeline.process_multiple_images(["a.jpg", "b.jpg", "c.jpg"])
+
+    assert [p["product_name"] for p in products] == ["a.jpg", "b.jpg", "c.jpg"]
+    assert tracker.events == [
+        ("decode", "a.jpg"), ("ocr", "a.jpg"),
+        ("decode", "b.jpg"), ("ocr", "b.jpg"),
+        ("decode", "c.jpg"), ("ocr", "c.jpg"),
+    ]
+    assert tracker.max_alive == 1
+    # The decoded image is released after OCR, before the LLM step
+    assert tracker.alive_during_llm == [0, 0, 0]
+
+
+def test_prefetch_stays_within_max_decoded_images(make_pipeline, tracker):
+    pipeline = make_pipeline(memory_bounded=True, max_decoded_images=2)
+
+    pipeline.process_multiple_images([f"{i}.jpg" for i in range(6)])
+
+    assert tracker.max_alive <= 2
+    assert all(alive <= 1 for alive in tracker.alive_during_llm)
+
+
+def test_memory_report_entries(make_pipeline):
+    pipeline = make_pipeline(memory_bounded=True)
+
+    pipeline.process_multiple_images(["/leaflets/a.jpg", "/leaflets/b.jpg"])
+
+    assert pipeline.memory_report == [
+        {"image": "a.jpg", "peak_rss_mb": 512.0, "rss_mb": 256.0, "per_image_peak": True},
+        {"image": "b.jpg", "peak_rss_mb": 512.0, "rss_mb": 256.0, "per_image_peak": True},
+    ]
+
+
+def test_max_decoded_images_must_be_positive(make_pipeline):
+    with pytest.raises(ValueError):
+        make_pipeline(memory_bounded=True, max_decoded_images=0)
+
+
+def test_main_rejects_non_positive_max_decoded_images(heavy_modules_stubbed, capsys):
+    import main
+
+    assert main.parse_args(["--max-decoded-images", "2"]).max_decoded_images == 2
+    with pytest.raises(SystemExit):
+        main.parse_args(["--max-decoded-images", "0"])
+    assert "must be at least 1" in capsys.readouterr().err
+
+
+def _raise_oserror(*args, **kwargs):
+    raise OSError("not available")
+
+
+def test_reset_peak_rss_without_clear_refs(memory, monkeypatch):
+    monkeypatch.setattr(memory, "open", _raise_oserror, raising=False)
+
+    assert memory.reset_peak_rss() is False
+
+
+def test_peak_rss_falls_back_to_getrusage(memory, monkeypatch):
+    monkeypatch.setattr(memory, "_proc_status_mb", lambda field: None)
+    usage = types.SimpleNamespace(ru_maxrss=2048)
+    monkeypatch.setattr(memory, "resource", types.SimpleNamespace(
+        RUSAGE_SELF=0, getrusage=lambda who: usage))
+    monkeypatch.setattr(memory.os, "uname", lambda: types.SimpleNamespace(sysname="Linux"))
+    assert memory.peak_rss_mb() == 2.0
+
+    monkeypatch.setattr(memory.os, "uname", lambda: types.SimpleNamespace(sysname="Darwin"))
+    usage.ru_maxrss = 2 * 1024 * 1024
+    assert memory.peak_rss_mb() == 2.0
+
+
+def test_peak_rss_unavailable(memory, monkeypatch):
+    monkeypatch.setattr(memory, "_proc_status_mb", lambda field: None)
+    monkeypatch.setattr(memory, "resource", None)
+
+    assert memory.peak_rss_mb() is None
+    monkeypatch.setattr(memory, "open", _raise_oserror, raising=False)
+    assert memory.current_rss_mb() is None
@@ -0,0 +1,76 @@
+import pytest
+
+
+class FakeOCR:
+    def __init__(self, **kwargs):
+        pass
+
+    def predict(self, image):
+        return [{"rec_texts": ["A", "$1.99"], "rec_boxes": [[0, 0, 100, 20], [0, 25, 100, 45]]}]
+
+
+class FakeRegionAgent:
+    """Records region requests and answers with one product per region."""
+
+    def __init__(self):
+        self.requests = []
+        self.fail = set()
+
+    def region_fingerprint(self):
+        return "test"
+
+    def extract_products(self, raw_ocr_text):
+        return [{"product_name": raw_ocr_text.split("\n")[0]}]
+
+    def extract_region_products(self, regions):
+        self.requests.append(dict(regions))
+        return {region_id: None if text in self.fail else [{"product_name": text.split("\n")[0]}]
+                for region_id, text in regions.items()}
+
+
+@pytest.fixture
+def make_pipeline(process_pipeline, monkeypatch):
+    monkeypatch.setattr(process_pipeline, "PaddleOCR", FakeOCR)
+    monkeypatch.setattr(process_pipeline, "LLMExtractionAgent", FakeRegionAgent)
+    return process_pipeline.CompletePipeline
+
+
+LEAFLET_TEXTS = ["WEEKLY SPECIALS", "A", "B", "$1.99", "$2.99"]
+LEAFLET_BOXES = [
+    [0, 0, 210, 30],
+    [0, 60, 100, 80], [110, 60, 210, 80],
+    [0, 85, 100, 105], [110, 85, 210, 105],
+]
+
+
+def test_incremental_sends_changed_regions_in_one_request(make_pipeline, tmp_path):
+    pipeline = make_pipeline(incremental=True, cache_dir=str(tmp_path))
+    agent = pipeline.llm_agent
+
+    products = pipeline._extract_incremental("leaflet.jpg", LEAFLET_TEXTS, LEAFLET_BOXES)
+    assert [p["product_name"] for p in products] == ["A", "B"]
+    # The header has no price and is never sent
+    assert len(agent.requests) == 1
+    assert sorted(agent.requests[0].values()) == ["A\n$1.99", "B\n$2.99"]
+
+    pipeline._extract_incremental("leaflet.jpg", LEAFLET_TEXTS, LEAFLET_BOXES)
+    assert len(agent.requests) == 1
+
+    reissued = ["WEEKLY SPECIALS", "A", "B", "$1.99", "$2.49"]
+    products = pipeline._extract_incremental("leaflet.jpg", reissued, LEAFLET_BOXES)
+    assert [p["product_name"] for p in products] == ["A", "B"]
+    assert list(agent.requests[1].values()) == ["B\n$2.49"]
+
+
+def test_incremental_retries_failed_regions(make_pipeline, tmp_path):
+    pipeline = make_pipeline(incremental=True, cache_dir=str(tmp_path))
+    agent = pipeline.llm_agent
+    agent.fail.add("B\n$2.99")
+
+    products = pipeline._extract_incremental("leaflet.jpg", LEAFLET_TEXTS, LEAFLET_BOXES)
+    assert [p["product_name"] for p in products] == ["A"]
+
+    agent.fail.clear()
+    products = pipeline._extract_incremental("leaflet.jpg", LEAFLET_TEXTS, LEAFLET_BOXES)
+    assert [p["product_name"] for p in products] == ["A", "B"]
+    assert list(agent.requests[1].values()) == ["B\n$2.99"]